@@ -1,4 +1,4 @@
-from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form, Depends
+from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form, Depends, Response
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -13,27 +13,245 @@ import httpx
 import pdfplumber
 from docx import Document
 import io
+import zlib
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from urllib.parse import quote
 import bcrypt
+from contextlib import asynccontextmanager
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# MongoDB connection (client is created per worker in lifespan)
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', '100'))
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '0'))
+client: Optional[AsyncIOMotorClient] = None
+db = None
+
+# Cache Configuration
+# CACHE_BACKEND=sqlite shares the cache between worker processes through CACHE_PATH
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+CACHE_PATH = os.environ.get('CACHE_PATH', str(ROOT_DIR / 'cache.sqlite3'))
+CACHE_TTL_SECONDS = int(os.environ.get('CACHE_TTL_SECONDS', '3600'))
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', '10000'))
+
+# Resume Uploads
+# The compressed file is stored inline in the resume document, which MongoDB caps at 16 MB
+MAX_RESUME_SIZE = int(os.environ.get('MAX_RESUME_SIZE', str(5 * 1024 * 1024)))
+RESUME_CONTENT_TYPES = {
+    '.pdf': 'application/pdf',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.doc': 'application/msword',
+}
 
 # HuggingFace Configuration
 HF_API_KEY = os.environ['HUGGINGFACE_API_KEY']
 HF_MODEL = os.environ['HUGGINGFACE_MODEL']
 HF_API_URL = f"https://api-inference.huggingface.co/models/{HF_MODEL}"
 
-app = FastAPI()
+AI_UNAVAILABLE_MESSAGE = "Content generation temporarily unavailable."
+
 api_router = APIRouter(prefix="/api")
 
+# ==================== Cache ====================
+class Cache:
+    """Key/value cache with TTL, kept in memory or in a SQLite file shared by all workers"""
+
+    def __init__(self, backend: str = 'memory', path: Optional[str] = None, ttl: int = 3600,
+                 max_entries: int = 10000, purge_interval: int = 300):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.purge_interval = purge_interval
+        # Size is checked every size_check_interval writes on SQLite, and
+        # eviction frees that many slots so it does not run on every write
+        self.size_check_interval = max(1, max_entries // 10)
+        self._writes = 0
+        self._last_purge = time.time()
+        self._memory: Dict[str, Any] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        if backend == 'sqlite':
+            self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, expires REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)")
+            self._conn.commit()
+
+    @property
+    def shared(self) -> bool:
+        """Whether every worker process sees the same entries"""
+        return self._conn is not None
+
+    def _get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            if self._conn is None:
+                entry = self._memory.get(key)
+                if entry and entry[0] > now:
+                    return entry[1]
+                return None
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires > ?", (key, now)
+            ).fetchone()
+            return row[0] if row else None
+
+    def _store(self, key: str, value: str, expires: float):
+        # Caller holds the lock
+        if self._conn is None:
+            self._memory[key] = (expires, value)
+        else:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                (key, value, expires)
+            )
+        self._enforce_limits()
+        if self._conn is not None:
+            self._conn.commit()
+
+    def _enforce_limits(self):
+        # Caller holds the lock; drops expired entries periodically and the
+        # soonest-expiring entries once the cache grows past max_entries
+        now = time.time()
+        if now - self._last_purge >= self.purge_interval:
+            self._delete_expired(now)
+            self._last_purge = now
+        if self._conn is None:
+            size = len(self._memory)
+        else:
+            self._writes += 1
+            if self._writes < self.size_check_interval:
+                return
+            self._writes = 0
+            size = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        if size <= self.max_entries:
+            return
+        excess = size - self.max_entries + self.size_check_interval - 1
+        if self._conn is None:
+            for key in sorted(self._memory, key=lambda k: self._memory[k][0])[:excess]:
+                del self._memory[key]
+            return
+        self._conn.execute(
+            "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires LIMIT ?)",
+            (excess,)
+        )
+
+    def _delete_expired(self, now: float):
+        # Caller holds the lock
+        if self._conn is None:
+            for key in [k for k, v in self._memory.items() if v[0] <= now]:
+                del self._memory[key]
+            return
+        self._conn.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+
+    def _rollback(self):
+        # Caller holds the lock; a failed write must not leave the shared
+        # connection inside a transaction that keeps the database locked
+        if self._conn is not None:
+            self._conn.rollback()
+
+    def _set(self, key: str, value: str):
+        with self._lock:
+            try:
+                self._store(key, value, time.time() + self.ttl)
+            except Exception:
+                self._rollback()
+                raise
+
+    def _incr(self, key: str) -> int:
+        with self._lock:
+            try:
+                if self._conn is None:
+                    entry = self._memory.get(key)
+                    value = int(entry[1]) + 1 if entry else 1
+                else:
+                    # BEGIN IMMEDIATE so concurrent workers never read the same counter value
+                    self._conn.execute("BEGIN IMMEDIATE")
+                    row = self._conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+                    value = int(row[0]) + 1 if row else 1
+                self._store(key, str(value), float('inf'))
+                return value
+            except Exception:
+                self._rollback()
+                raise
+
+    def _delete_prefix(self, prefix: str):
+        with self._lock:
+            if self._conn is None:
+                for key in [k for k in self._memory if k.startswith(prefix)]:
+                    del self._memory[key]
+                return
+            escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            try:
+                self._conn.execute("DELETE FROM cache WHERE key LIKE ? ESCAPE '\\'", (escaped + '%',))
+                self._conn.commit()
+            except Exception:
+                self._rollback()
+                raise
+
+    def _purge_expired(self):
+        now = time.time()
+        with self._lock:
+            try:
+                self._delete_expired(now)
+                self._last_purge = now
+                if self._conn is not None:
+                    self._conn.commit()
+            except Exception:
+                self._rollback()
+                raise
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = await asyncio.to_thread(self._get, key)
+        return json.loads(value) if value is not None else None
+
+    async def set(self, key: str, value: Any):
+        await asyncio.to_thread(self._set, key, json.dumps(value, default=str))
+
+    async def incr(self, key: str) -> int:
+        """Atomically increment a counter that never expires"""
+        return await asyncio.to_thread(self._incr, key)
+
+    async def delete_prefix(self, prefix: str):
+        await asyncio.to_thread(self._delete_prefix, prefix)
+
+    async def purge_expired(self):
+        await asyncio.to_thread(self._purge_expired)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+
+cache: Optional[Cache] = None
+
+def get_cache() -> Cache:
+    """Return the cache created by the app lifespan"""
+    if cache is None:
+        raise RuntimeError(
+            "Cache is not initialised; start the app through its lifespan "
+            "(e.g. `with TestClient(app):`) before handling requests"
+        )
+    return cache
+
 # ==================== AI Helper Functions ====================
-async def generate_ai_content(prompt: str, max_tokens: int = 500) -> str:
-    """Generate content using Llama model via HuggingFace API"""
+async def generate_ai_content(prompt: str, max_tokens: int = 500, use_cache: bool = False) -> str:
+    """Generate content using Llama model via HuggingFace API
+
+    Set use_cache for prompts that repeat across requests and should return the same text.
+    """
+    cache_key = "ai:" + hashlib.sha256(f"{max_tokens}:{prompt}".encode('utf-8')).hexdigest()
+    if use_cache:
+        cached = await get_cache().get(cache_key)
+        if cached is not None:
+            return cached
+    
     headers = {"Authorization": f"Bearer {HF_API_KEY}"}
     payload = {
         "inputs": prompt,
@@ -51,11 +269,16 @@ async def generate_ai_content(prompt: str, max_tokens: int = 500) -> str:
             response.raise_for_status()
             result = response.json()
             if isinstance(result, list) and len(result) > 0:
-                return result[0].get('generated_text', '').strip()
-            return str(result)
+                content = result[0].get('generated_text', '').strip()
+            else:
+                return str(result)
         except Exception as e:
             logging.error(f"AI generation error: {str(e)}")
-            return "Content generation temporarily unavailable."
+            return AI_UNAVAILABLE_MESSAGE
+    
+    if use_cache and content:
+        await get_cache().set(cache_key, content)
+    return content
 
 def extract_text_from_pdf(file_content: bytes) -> str:
     """Extract text from PDF file"""
@@ -79,6 +302,82 @@ def extract_text_from_docx(file_content: bytes) -> str:
         logging.error(f"DOCX extraction error: {str(e)}")
         return ""
 
+# ==================== Resume Storage Helpers ====================
+async def store_resume(resume_text: str, file_content: Optional[bytes] = None, filename: Optional[str] = None) -> str:
+    """Store compressed resume text and file in the resumes collection, keyed by content hash"""
+    resume_id = hashlib.sha256(file_content or resume_text.encode('utf-8')).hexdigest()
+    doc = {
+        "text": zlib.compress(resume_text.encode('utf-8')),
+        "text_length": len(resume_text),
+        "created_date": datetime.now(timezone.utc).isoformat()
+    }
+    if file_content is not None:
+        doc["filename"] = filename
+        doc["content_type"] = RESUME_CONTENT_TYPES.get(
+            Path(filename).suffix.lower(), "application/octet-stream"
+        )
+        doc["file"] = zlib.compress(file_content)
+    await db.resumes.update_one({"_id": resume_id}, {"$setOnInsert": doc}, upsert=True)
+    return resume_id
+
+async def load_resume_text(resume_id: str) -> Optional[str]:
+    """Load and decompress resume text from the resumes collection"""
+    resume = await db.resumes.find_one({"_id": resume_id}, {"text": 1})
+    if not resume:
+        return None
+    return zlib.decompress(resume['text']).decode('utf-8')
+
+async def load_resume_file(resume_id: str) -> Optional[Dict[str, Any]]:
+    """Load and decompress the original resume file from the resumes collection"""
+    resume = await db.resumes.find_one({"_id": resume_id}, {"filename": 1, "content_type": 1, "file": 1})
+    if not resume or 'file' not in resume:
+        return None
+    return {
+        "filename": resume['filename'],
+        "content_type": resume.get('content_type', "application/octet-stream"),
+        "content": zlib.decompress(resume['file'])
+    }
+
+async def migrate_embedded_resume(app: Dict[str, Any]) -> str:
+    """Move resume text embedded in an older application document into the resumes collection"""
+    resume_id = await store_resume(app['resume_text'])
+    await db.job_applications.update_one(
+        {"id": app['id']},
+        {"$set": {"resume_id": resume_id}, "$unset": {"resume_text": ""}}
+    )
+    return resume_id
+
+def content_disposition(filename: str) -> str:
+    """Build an attachment Content-Disposition header that is safe for any filename"""
+    fallback = filename.encode('ascii', 'ignore').decode('ascii')
+    fallback = fallback.replace('"', '').replace('\\', '').strip()
+    if not fallback or fallback.startswith('.'):
+        fallback = "resume" + fallback
+    return f'attachment; filename="{fallback}"; filename*=UTF-8\'\'{quote(filename, safe="")}'
+
+# ==================== Job Listing Helpers ====================
+async def load_jobs(status: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Load job postings from the shared cache, falling back to MongoDB"""
+    query = {"status": status} if status else {}
+    jobs_cache = get_cache()
+    # A per-process cache cannot see invalidations made by other workers
+    if not jobs_cache.shared:
+        return await db.job_postings.find(query, {"_id": 0}).to_list(1000)
+    
+    # Keys carry the generation read before querying, so a listing fetched
+    # before a concurrent write is stored under a generation nobody reads again
+    generation = await jobs_cache.get("jobs:generation") or 0
+    cache_key = f"jobs:{generation}:{status or ''}"
+    jobs = await jobs_cache.get(cache_key)
+    if jobs is None:
+        jobs = await db.job_postings.find(query, {"_id": 0}).to_list(1000)
+        await jobs_cache.set(cache_key, jobs)
+    return jobs
+
+async def invalidate_jobs():
+    """Make every worker reload job listings from MongoDB"""
+    await get_cache().incr("jobs:generation")
+
 # ==================== Models ====================
 class ContactSubmission(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -125,7 +424,8 @@ class JobApplication(BaseModel):
     name: str
     email: EmailStr
     phone: str
-    resume_text: str
+    resume_id: Optional[str] = None
+    resume_text: Optional[str] = None  # Loaded on demand from the resumes collection
     cover_letter: Optional[str] = None
     ai_analysis: Optional[Dict[str, Any]] = None
     status: str = "pending"  # pending, reviewing, shortlisted, rejected
@@ -283,12 +583,12 @@ async def create_job(input: JobPostingCreate):
     doc['posted_date'] = doc['posted_date'].isoformat()
     
     await db.job_postings.insert_one(doc)
+    await invalidate_jobs()
     return job_obj
 
 @api_router.get("/jobs", response_model=List[JobPosting])
 async def get_jobs(status: Optional[str] = None):
-    query = {"status": status} if status else {}
-    jobs = await db.job_postings.find(query, {"_id": 0}).to_list(1000)
+    jobs = await load_jobs(status)
     for job in jobs:
         if isinstance(job['posted_date'], str):
             job['posted_date'] = datetime.fromisoformat(job['posted_date'])
@@ -311,6 +611,7 @@ async def update_job(job_id: str, input: JobPostingCreate):
     
     update_data = input.model_dump()
     await db.job_postings.update_one({"id": job_id}, {"$set": update_data})
+    await invalidate_jobs()
     
     updated_job = await db.job_postings.find_one({"id": job_id}, {"_id": 0})
     if isinstance(updated_job['posted_date'], str):
@@ -322,6 +623,7 @@ async def delete_job(job_id: str):
     result = await db.job_postings.delete_one({"id": job_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Job not found")
+    await invalidate_jobs()
     return {"message": "Job deleted successfully"}
 
 # Job Application Routes
@@ -339,6 +641,9 @@ async def submit_application(
     resume_content = await resume.read()
     resume_text = ""
     
+    if len(resume_content) > MAX_RESUME_SIZE:
+        raise HTTPException(status_code=413, detail="Resume file is too large")
+    
     if resume.filename.lower().endswith('.pdf'):
         resume_text = extract_text_from_pdf(resume_content)
     elif resume.filename.lower().endswith(('.docx', '.doc')):
@@ -365,6 +670,9 @@ async def submit_application(
     ai_analysis_raw = await generate_ai_content(analysis_prompt, 400)
     ai_analysis = {"raw_analysis": ai_analysis_raw, "resume_length": len(resume_text)}
     
+    # Store resume separately so application documents stay small
+    resume_id = await store_resume(resume_text, resume_content, resume.filename)
+    
     # Create application
     application = JobApplication(
         job_id=job_id,
@@ -372,12 +680,12 @@ async def submit_application(
         name=name,
         email=email,
         phone=phone,
-        resume_text=resume_text,
+        resume_id=resume_id,
         cover_letter=cover_letter,
         ai_analysis=ai_analysis
     )
     
-    doc = application.model_dump()
+    doc = application.model_dump(exclude={"resume_text"})
     doc['applied_date'] = doc['applied_date'].isoformat()
     
     await db.job_applications.insert_one(doc)
@@ -401,7 +709,7 @@ async def get_applications(job_id: Optional[str] = None, status: Optional[str] =
     if status:
         query["status"] = status
     
-    applications = await db.job_applications.find(query, {"_id": 0}).to_list(1000)
+    applications = await db.job_applications.find(query, {"_id": 0, "resume_text": 0}).to_list(1000)
     for app in applications:
         if isinstance(app['applied_date'], str):
             app['applied_date'] = datetime.fromisoformat(app['applied_date'])
@@ -414,8 +722,28 @@ async def get_application(app_id: str):
         raise HTTPException(status_code=404, detail="Application not found")
     if isinstance(app['applied_date'], str):
         app['applied_date'] = datetime.fromisoformat(app['applied_date'])
+    if app.get('resume_text') and not app.get('resume_id'):
+        app['resume_id'] = await migrate_embedded_resume(app)
+    elif app.get('resume_id') and not app.get('resume_text'):
+        app['resume_text'] = await load_resume_text(app['resume_id'])
     return app
 
+@api_router.get("/applications/{app_id}/resume")
+async def get_application_resume(app_id: str):
+    app = await db.job_applications.find_one({"id": app_id}, {"_id": 0, "resume_id": 1})
+    if not app or not app.get('resume_id'):
+        raise HTTPException(status_code=404, detail="Resume not found")
+    
+    resume_file = await load_resume_file(app['resume_id'])
+    if not resume_file:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    
+    return Response(
+        content=resume_file['content'],
+        media_type=resume_file['content_type'],
+        headers={"Content-Disposition": content_disposition(resume_file['filename'])}
+    )
+
 @api_router.put("/applications/{app_id}/status")
 async def update_application_status(app_id: str, status: str):
     result = await db.job_applications.update_one(
@@ -488,7 +816,7 @@ async def summarize_blog(slug: str):
     Title: {blog['title']}
     Content: {blog['content']}"""
     
-    summary = await generate_ai_content(summary_prompt, 200)
+    summary = await generate_ai_content(summary_prompt, 200, use_cache=True)
     return {"summary": summary}
 
 @api_router.delete("/blog/{slug}")
@@ -638,6 +966,18 @@ async def login_admin(input: AdminLogin):
     
     return {"message": "Login successful", "admin_id": admin['id'], "username": admin['username']}
 
+@api_router.post("/admin/migrate-resumes")
+async def migrate_resumes():
+    """Move resume text embedded in older applications into the resumes collection"""
+    migrated = 0
+    async for app in db.job_applications.find(
+        {"resume_text": {"$exists": True}, "resume_id": {"$exists": False}},
+        {"_id": 0, "id": 1, "resume_text": 1}
+    ):
+        await migrate_embedded_resume(app)
+        migrated += 1
+    return {"message": "Resumes migrated successfully", "migrated": migrated}
+
 # Analytics
 @api_router.get("/admin/analytics")
 async def get_analytics():
@@ -657,7 +997,7 @@ async def get_analytics():
     
     Provide 2-3 insights about business health."""
     
-    ai_summary = await generate_ai_content(summary_prompt, 150)
+    ai_summary = await generate_ai_content(summary_prompt, 150, use_cache=True)
     
     return {
         "total_contacts": total_contacts,
@@ -668,22 +1008,64 @@ async def get_analytics():
         "ai_summary": ai_summary
     }
 
-app.include_router(api_router)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+# ==================== App Lifecycle ====================
+async def warm_up():
+    """Create indexes and prefill caches before serving requests"""
+    await client.admin.command('ping')
+    await asyncio.gather(
+        db.job_postings.create_index("id"),
+        db.job_postings.create_index("status"),
+        db.job_applications.create_index("id"),
+        db.job_applications.create_index([("job_id", 1), ("status", 1)]),
+        db.blog_posts.create_index("slug"),
+        db.blog_posts.create_index("published"),
+        db.testimonials.create_index("featured"),
+        db.projects.create_index("category"),
+        db.projects.create_index("technologies"),
+        db.admin_users.create_index("username"),
+    )
+    await cache.purge_expired()
+    await asyncio.gather(load_jobs(), load_jobs("active"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global client, db, cache
+    cache = Cache(CACHE_BACKEND, CACHE_PATH, CACHE_TTL_SECONDS, CACHE_MAX_ENTRIES)
+    try:
+        client = AsyncIOMotorClient(
+            mongo_url,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE
+        )
+        try:
+            db = client[os.environ['DB_NAME']]
+            try:
+                await warm_up()
+            except Exception as e:
+                logger.error(f"Warm-up error: {str(e)}")
+            yield
+        finally:
+            client.close()
+    finally:
+        cache.close()
+
+def create_app() -> FastAPI:
+    """Build the application; each worker process calls this once"""
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(api_router)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    return app
+
+app = create_app()
\ No newline at end of file
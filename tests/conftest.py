@@ -0,0 +1,113 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'test_database')
+os.environ.setdefault('HUGGINGFACE_API_KEY', 'test-key')
+os.environ.setdefault('HUGGINGFACE_MODEL', 'test-model')
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
+
+import server  # noqa: E402
+
+
+def _matches(doc, query):
+    for key, value in query.items():
+        if isinstance(value, dict) and '$exists' in value:
+            if (key in doc) != value['$exists']:
+                return False
+        elif doc.get(key) != value:
+            return False
+    return True
+
+
+class FakeResult:
+    def __init__(self, matched_count=0, modified_count=0, deleted_count=0):
+        self.matched_count = matched_count
+        self.modified_count = modified_count
+        self.deleted_count = deleted_count
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return self.docs[:length]
+
+    def __aiter__(self):
+        self._iter = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    """Minimal in-memory stand-in for a Motor collection"""
+
+    def __init__(self):
+        self.docs = []
+
+    def _project(self, doc, projection):
+        doc = dict(doc)
+        if projection and projection.get('_id') == 0:
+            doc.pop('_id', None)
+        return doc
+
+    async def insert_one(self, doc):
+        self.docs.append(dict(doc))
+
+    async def find_one(self, query, projection=None):
+        for doc in self.docs:
+            if _matches(doc, query):
+                return self._project(doc, projection)
+        return None
+
+    def find(self, query, projection=None):
+        return FakeCursor([self._project(d, projection) for d in self.docs if _matches(d, query)])
+
+    async def count_documents(self, query):
+        return len([d for d in self.docs if _matches(d, query)])
+
+    async def update_one(self, query, update, upsert=False):
+        for doc in self.docs:
+            if _matches(doc, query):
+                doc.update(update.get('$set', {}))
+                for key in update.get('$unset', {}):
+                    doc.pop(key, None)
+                return FakeResult(matched_count=1, modified_count=1)
+        if upsert:
+            doc = dict(query)
+            doc.update(update.get('$setOnInsert', {}))
+            doc.update(update.get('$set', {}))
+            self.docs.append(doc)
+        return FakeResult()
+
+    async def delete_one(self, query):
+        for doc in self.docs:
+            if _matches(doc, query):
+                self.docs.remove(doc)
+                return FakeResult(deleted_count=1)
+        return FakeResult()
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.collections = {}
+
+    def __getattr__(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    db = FakeDatabase()
+    monkeypatch.setattr(server, 'db', db)
+    return db
@@ -0,0 +1,310 @@
+import asyncio
+import sqlite3
+
+import httpx
+import pytest
+
+import server
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_cache(request, tmp_path):
+    caches = []
+
+    def factory(**kwargs):
+        cache = server.Cache(request.param, str(tmp_path / 'cache.sqlite3'), **kwargs)
+        caches.append(cache)
+        return cache
+
+    yield factory
+    for cache in caches:
+        cache.close()
+
+
+@pytest.fixture
+def shared_cache(monkeypatch, tmp_path):
+    cache = server.Cache('sqlite', str(tmp_path / 'cache.sqlite3'))
+    monkeypatch.setattr(server, 'cache', cache)
+    yield cache
+    cache.close()
+
+
+def test_get_set_round_trip(make_cache):
+    cache = make_cache()
+
+    run(cache.set("jobs:1:", [{"id": "job-1", "requirements": ["Python"]}]))
+
+    assert run(cache.get("jobs:1:")) == [{"id": "job-1", "requirements": ["Python"]}]
+    assert run(cache.get("missing")) is None
+
+
+def test_entries_expire_after_ttl(make_cache):
+    cache = make_cache(ttl=0)
+
+    run(cache.set("ai:key", "text"))
+
+    assert run(cache.get("ai:key")) is None
+
+
+def test_purge_expired_removes_entries(make_cache):
+    cache = make_cache(ttl=0)
+    run(cache.set("ai:key", "text"))
+
+    run(cache.purge_expired())
+
+    if cache.shared:
+        assert cache._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] == 0
+    else:
+        assert cache._memory == {}
+
+
+def test_delete_prefix_treats_wildcards_literally(make_cache):
+    cache = make_cache()
+    for key in ["a_b:1", "axb:1", "a%b:1", "azzb:1"]:
+        run(cache.set(key, key))
+
+    run(cache.delete_prefix("a_b"))
+    run(cache.delete_prefix("a%b"))
+
+    assert run(cache.get("a_b:1")) is None
+    assert run(cache.get("a%b:1")) is None
+    assert run(cache.get("axb:1")) == "axb:1"
+    assert run(cache.get("azzb:1")) == "azzb:1"
+
+
+def test_size_is_capped(make_cache):
+    cache = make_cache(max_entries=3)
+    run(cache.incr("jobs:generation"))
+
+    for i in range(10):
+        run(cache.set(f"ai:{i}", i))
+
+    assert run(cache.get("jobs:generation")) == 1
+    assert run(cache.get("ai:9")) == 9
+    assert run(cache.get("ai:0")) is None
+
+
+def test_eviction_frees_a_batch_of_slots(make_cache):
+    cache = make_cache(max_entries=20)
+    sizes = []
+
+    for i in range(40):
+        run(cache.set(f"ai:{i}", i))
+        if cache.shared:
+            sizes.append(cache._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0])
+        else:
+            sizes.append(len(cache._memory))
+
+    # Size is checked in batches, and each eviction frees a batch of slots
+    assert max(sizes) <= 20 + cache.size_check_interval - 1
+    assert min(sizes[20:]) <= 20 - cache.size_check_interval + 1
+    assert run(cache.get("ai:39")) == 39
+
+
+def test_failed_write_rolls_back_transaction(tmp_path, monkeypatch):
+    cache = server.Cache('sqlite', str(tmp_path / 'cache.sqlite3'))
+    run(cache.incr("jobs:generation"))
+
+    def fail():
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(cache, '_enforce_limits', fail)
+    with pytest.raises(sqlite3.OperationalError):
+        run(cache.incr("jobs:generation"))
+    assert not cache._conn.in_transaction
+
+    monkeypatch.undo()
+    assert run(cache.incr("jobs:generation")) == 2
+    cache.close()
+
+
+def test_incr_counts_up(make_cache):
+    cache = make_cache(ttl=0)
+
+    assert run(cache.incr("jobs:generation")) == 1
+    assert run(cache.incr("jobs:generation")) == 2
+    assert run(cache.get("jobs:generation")) == 2
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    first = server.Cache('sqlite', path)
+    second = server.Cache('sqlite', path)
+
+    run(first.set("ai:key", "text"))
+    run(first.incr("jobs:generation"))
+
+    assert run(second.get("ai:key")) == "text"
+    assert run(second.incr("jobs:generation")) == 2
+    first.close()
+    second.close()
+
+
+def test_get_cache_before_startup_raises(monkeypatch):
+    monkeypatch.setattr(server, 'cache', None)
+
+    with pytest.raises(RuntimeError, match="lifespan"):
+        server.get_cache()
+
+
+def test_load_jobs_skips_per_process_cache(fake_db, monkeypatch):
+    cache = server.Cache('memory')
+    monkeypatch.setattr(server, 'cache', cache)
+    fake_db.job_postings.docs.append({"id": "job-1", "status": "active"})
+
+    assert run(server.load_jobs()) == [{"id": "job-1", "status": "active"}]
+    assert cache._memory == {}
+
+
+def test_job_writes_invalidate_shared_listing(fake_db, shared_cache):
+    fake_db.job_postings.docs.append({"id": "job-1", "status": "active"})
+    assert [job['id'] for job in run(server.load_jobs("active"))] == ["job-1"]
+
+    # Bypasses the API, so the cached listing is still served
+    fake_db.job_postings.docs.append({"id": "job-2", "status": "active"})
+    assert [job['id'] for job in run(server.load_jobs("active"))] == ["job-1"]
+
+    run(server.delete_job("job-1"))
+    assert [job['id'] for job in run(server.load_jobs("active"))] == ["job-2"]
+
+
+def test_stale_listing_written_after_invalidation_is_ignored(fake_db, shared_cache):
+    fake_db.job_postings.docs.append({"id": "job-1", "status": "active"})
+
+    # Simulate a read whose snapshot lands after a concurrent write invalidated it
+    run(shared_cache.set("jobs:0:active", [{"id": "stale"}]))
+    run(server.invalidate_jobs())
+
+    assert [job['id'] for job in run(server.load_jobs("active"))] == ["job-1"]
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+def fake_hf_client(monkeypatch, payloads):
+    calls = []
+
+    class FakeAsyncClient:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *args):
+            pass
+
+        async def post(self, url, headers=None, json=None):
+            calls.append(json)
+            payload = payloads.pop(0)
+            if isinstance(payload, Exception):
+                raise payload
+            return FakeResponse(payload)
+
+    monkeypatch.setattr(server.httpx, 'AsyncClient', FakeAsyncClient)
+    return calls
+
+
+def test_cached_ai_content_is_reused(monkeypatch, shared_cache):
+    calls = fake_hf_client(monkeypatch, [[{"generated_text": " Summary "}]])
+
+    assert run(server.generate_ai_content("prompt", use_cache=True)) == "Summary"
+    assert run(server.generate_ai_content("prompt", use_cache=True)) == "Summary"
+    assert len(calls) == 1
+
+
+def test_ai_content_is_not_cached_by_default(monkeypatch, shared_cache):
+    calls = fake_hf_client(monkeypatch, [
+        [{"generated_text": "First"}],
+        [{"generated_text": "Second"}],
+    ])
+
+    assert run(server.generate_ai_content("prompt")) == "First"
+    assert run(server.generate_ai_content("prompt")) == "Second"
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("failure, expected", [
+    (httpx.ConnectError("offline"), server.AI_UNAVAILABLE_MESSAGE),
+    (["text"], server.AI_UNAVAILABLE_MESSAGE),
+    ({"error": "Model is loading"}, "{'error': 'Model is loading'}"),
+    ([{"generated_text": ""}], ""),
+    ([{"generated_text": "   "}], ""),
+])
+def test_failed_ai_calls_are_not_cached(monkeypatch, shared_cache, failure, expected):
+    fake_hf_client(monkeypatch, [failure, [{"generated_text": "Recovered"}]])
+
+    assert run(server.generate_ai_content("prompt", use_cache=True)) == expected
+    assert run(server.generate_ai_content("prompt", use_cache=True)) == "Recovered"
+
+
+class FakeMotorClient:
+    instances = []
+
+    def __init__(self, *args, **kwargs):
+        self.kwargs = kwargs
+        self.closed = False
+        FakeMotorClient.instances.append(self)
+
+    def __getitem__(self, name):
+        return object()
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_motor(monkeypatch):
+    FakeMotorClient.instances = []
+    monkeypatch.setattr(server, 'AsyncIOMotorClient', FakeMotorClient)
+
+    async def no_warm_up():
+        pass
+
+    monkeypatch.setattr(server, 'warm_up', no_warm_up)
+    monkeypatch.setattr(server, 'CACHE_BACKEND', 'memory')
+    return FakeMotorClient
+
+
+def test_lifespan_closes_client_and_cache_on_error(fake_motor, monkeypatch):
+    closed = []
+    monkeypatch.setattr(server.Cache, 'close', lambda self: closed.append(self))
+
+    async def serve():
+        async with server.lifespan(server.app):
+            raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        run(serve())
+
+    assert fake_motor.instances[0].closed
+    assert closed == [server.cache]
+
+
+def test_lifespan_skips_client_when_cache_fails(fake_motor, monkeypatch):
+    def broken_cache(*args, **kwargs):
+        raise sqlite3.OperationalError("unable to open database file")
+
+    monkeypatch.setattr(server, 'Cache', broken_cache)
+    monkeypatch.setattr(server, 'cache', None)
+
+    async def serve():
+        async with server.lifespan(server.app):
+            pass
+
+    with pytest.raises(sqlite3.OperationalError):
+        run(serve())
+
+    assert fake_motor.instances == []
@@ -0,0 +1,159 @@
+import asyncio
+import io
+import zlib
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_store_and_load_resume_round_trip(fake_db):
+    resume_id = run(server.store_resume("Python developer", b"%PDF-1.4 file", "cv.pdf"))
+
+    stored = fake_db.resumes.docs[0]
+    assert stored['_id'] == resume_id
+    assert zlib.decompress(stored['text']) == b"Python developer"
+    assert stored['content_type'] == "application/pdf"
+    assert run(server.load_resume_text(resume_id)) == "Python developer"
+    resume_file = run(server.load_resume_file(resume_id))
+    assert resume_file == {
+        "filename": "cv.pdf",
+        "content_type": "application/pdf",
+        "content": b"%PDF-1.4 file"
+    }
+
+
+def test_store_resume_deduplicates_by_content_hash(fake_db):
+    first = run(server.store_resume("text", b"same bytes", "a.docx"))
+    second = run(server.store_resume("text", b"same bytes", "b.docx"))
+
+    assert first == second
+    assert len(fake_db.resumes.docs) == 1
+    assert fake_db.resumes.docs[0]['filename'] == "a.docx"
+
+
+def test_get_application_loads_resume_text(fake_db):
+    resume_id = run(server.store_resume("Stored resume", b"bytes", "cv.pdf"))
+    fake_db.job_applications.docs.append({
+        "id": "app-1", "job_id": "job-1", "resume_id": resume_id,
+        "applied_date": "2025-01-01T00:00:00+00:00"
+    })
+
+    app = run(server.get_application("app-1"))
+
+    assert app['resume_text'] == "Stored resume"
+
+
+def test_get_application_migrates_embedded_resume_text(fake_db):
+    fake_db.job_applications.docs.append({
+        "id": "app-1", "job_id": "job-1", "resume_text": "Legacy resume",
+        "applied_date": "2025-01-01T00:00:00+00:00"
+    })
+
+    app = run(server.get_application("app-1"))
+
+    assert app['resume_text'] == "Legacy resume"
+    stored = fake_db.job_applications.docs[0]
+    assert 'resume_text' not in stored
+    assert run(server.load_resume_text(stored['resume_id'])) == "Legacy resume"
+
+
+def test_migrate_resumes_moves_all_embedded_text(fake_db):
+    fake_db.job_applications.docs.extend([
+        {"id": "app-1", "resume_text": "One"},
+        {"id": "app-2", "resume_text": "Two"},
+        {"id": "app-3", "resume_id": "existing"},
+    ])
+
+    result = run(server.migrate_resumes())
+
+    assert result['migrated'] == 2
+    assert all('resume_text' not in doc for doc in fake_db.job_applications.docs)
+    assert len(fake_db.resumes.docs) == 2
+
+
+def test_get_application_resume_returns_original_file(fake_db):
+    resume_id = run(server.store_resume("text", b"docx bytes", 'my "cv".docx'))
+    fake_db.job_applications.docs.append({"id": "app-1", "resume_id": resume_id})
+
+    response = run(server.get_application_resume("app-1"))
+
+    assert response.body == b"docx bytes"
+    assert response.media_type == server.RESUME_CONTENT_TYPES['.docx']
+    assert response.headers['content-disposition'] == (
+        'attachment; filename="my cv.docx"; filename*=UTF-8\'\'my%20%22cv%22.docx'
+    )
+
+
+def test_get_application_resume_encodes_non_latin_filename(fake_db):
+    resume_id = run(server.store_resume("text", b"pdf bytes", "简历.pdf"))
+    fake_db.job_applications.docs.append({"id": "app-1", "resume_id": resume_id})
+
+    response = run(server.get_application_resume("app-1"))
+
+    assert response.headers['content-disposition'] == (
+        'attachment; filename="resume.pdf"; filename*=UTF-8\'\'%E7%AE%80%E5%8E%86.pdf'
+    )
+
+
+@pytest.mark.parametrize("application", [
+    None,
+    {"id": "app-1"},
+    {"id": "app-1", "resume_id": "missing"},
+])
+def test_get_application_resume_not_found(fake_db, application):
+    if application:
+        fake_db.job_applications.docs.append(application)
+
+    with pytest.raises(HTTPException) as exc:
+        run(server.get_application_resume("app-1"))
+
+    assert exc.value.status_code == 404
+
+
+def test_get_application_resume_not_found_for_migrated_text(fake_db):
+    resume_id = run(server.store_resume("Legacy resume"))
+    fake_db.job_applications.docs.append({"id": "app-1", "resume_id": resume_id})
+
+    with pytest.raises(HTTPException) as exc:
+        run(server.get_application_resume("app-1"))
+
+    assert exc.value.status_code == 404
+
+
+def test_submit_application_rejects_oversized_resume(fake_db, monkeypatch):
+    monkeypatch.setattr(server, 'MAX_RESUME_SIZE', 10)
+    resume = server.UploadFile(io.BytesIO(b"x" * 11), filename="cv.pdf")
+
+    with pytest.raises(HTTPException) as exc:
+        run(server.submit_application(
+            job_id="job-1", job_title="Engineer", name="A", email="a@example.com",
+            phone="1", cover_letter=None, resume=resume
+        ))
+
+    assert exc.value.status_code == 413
+    assert fake_db.resumes.docs == []
+
+
+def test_submit_application_stores_only_resume_reference(fake_db, monkeypatch):
+    async def fake_ai(prompt, max_tokens=500, use_cache=False):
+        return "analysis"
+
+    monkeypatch.setattr(server, 'extract_text_from_pdf', lambda content: "Resume text")
+    monkeypatch.setattr(server, 'generate_ai_content', fake_ai)
+    resume = server.UploadFile(io.BytesIO(b"%PDF"), filename="cv.pdf")
+
+    result = run(server.submit_application(
+        job_id="job-1", job_title="Engineer", name="A", email="a@example.com",
+        phone="1", cover_letter=None, resume=resume
+    ))
+
+    stored = fake_db.job_applications.docs[0]
+    assert stored['id'] == result['application_id']
+    assert 'resume_text' not in stored
+    assert run(server.load_resume_text(stored['resume_id'])) == "Resume text"